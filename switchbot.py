@@ -1,15 +1,28 @@
 import sys
 import yaml
 import json
-import signal
 import asyncio
 import argparse
+import functools
 
-from time import time
-from datetime import datetime
+from time import time, strftime, localtime
 from bleak import BleakScanner
 from signal import signal, SIGINT
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson returns bytes from a single C pass. fall back to compact stdlib json.
+_dumps = orjson.dumps if orjson else \
+    lambda o: json.dumps(o, separators=(",", ":"), ensure_ascii=False).encode()
+
 # these things are super accurate; using some swiss made sensor. (tested)
 # it's possible to pair - i guess for reading backlog data, but to save energy
 # they *openly* broadcast data in the bluetooth manufacturer data header.
@@ -28,41 +41,47 @@ from signal import signal, SIGINT
 #
 # phil8192@gmail.com | phil@cipherdusk.com
 
+# don't flush stdout per reading. flush after FLUSH_EVERY readings or at most
+# FLUSH_SECS after the first unflushed one, so a |pipe stays live without -u.
+FLUSH_EVERY = 32
+FLUSH_SECS = 0.5
 
-def get_humidity(b: bytes) -> int:
-    return b & 0x7F
-
-
-def get_temp(b1: bytes, b2: bytes) -> float:
-    temp_sign = (1 if (b2 & 0x80) > 0 else -1)
-    return (b1 & 0x0F) * 0.1 + (b2 & 0x7F) * temp_sign
-
+# pretty print column widths.
+PP_LOCATION_WIDTH = 15
+PP_ID_WIDTH = 10
+PP_RSSI_WIDTH = 4
 
-def get_light(b: bytes) -> int:
-    return b & 0x7F
 
+# temp: low nibble of b1 = tenths, b2 bit 7 = above zero, b2 bits 6:0 = degrees.
+# the sign applies to the whole value; zero always comes out positive.
+# humidity/light: low 7 bits.
 
 def parse_hub(data: bytes) -> tuple[float, int, int]:
     # first 6 bytes = mac.
-    humidity = get_humidity(data[15])
-    temp = get_temp(data[13], data[14])
-    light = get_light(data[12])
-    return temp, humidity, light
+    b12, b13, b14, b15 = data[12], data[13], data[14], data[15]
+    temp = (b13 & 0x0F) * 0.1 + (b14 & 0x7F)
+    return (temp if b14 & 0x80 or not temp else -temp), b15 & 0x7F, b12 & 0x7F
     
 
-def parse_sensor(data: bytes) -> tuple[float, int]:
-    # first 6 bytes = mac.
-    humidity = get_humidity(data[10])
-    temp = get_temp(data[8], data[9])
-    return temp, humidity
+def parse_sensor(data: bytes) -> tuple[float, int, None]:
+    # first 6 bytes = mac. no light sensor.
+    b8, b9, b10 = data[8], data[9], data[10]
+    temp = (b8 & 0x0F) * 0.1 + (b9 & 0x7F)
+    return (temp if b9 & 0x80 or not temp else -temp), b10 & 0x7F, None
 
 
 def load_device_info() -> dict:
     with open("devices.yaml", "r") as f:
-        sensors = yaml.safe_load(f)
+        sensors = yaml.load(f, Loader=SafeLoader)
     return sensors
 
 
+@functools.lru_cache(maxsize=256)
+def _pp_label(location: str, id: str) -> str:
+    # (location, id) is a small fixed set; pad once per device.
+    return f"{location.ljust(PP_LOCATION_WIDTH)} {id.ljust(PP_ID_WIDTH)}"
+
+
 def _pp(
         time: int,
         location: str, 
@@ -71,11 +90,10 @@ def _pp(
         temp: float, 
         humidity: int, 
         light: int | None) -> None:
-    time = datetime.fromtimestamp(time) # local time.
+    time = strftime("%Y-%m-%d %H:%M:%S", localtime(time)) # local time.
     light = f"light level = {light}" if light else ""
-    out = (f"{time}\t{location.ljust(15)} {id.ljust(10)} ({str(rssi).rjust(4)}"
-           f"dBm)\ttemp = {temp}c humidity = {humidity}% {light}")
-    print(out)
+    print(f"{time}\t{_pp_label(location, id)} ({str(rssi).rjust(PP_RSSI_WIDTH)}"
+          f"dBm)\ttemp = {temp}c humidity = {humidity}% {light}")
 
 
 def _csv(
@@ -99,7 +117,7 @@ def _json(
         humidity: int,
         light: int | None) -> None:
     if light is None: del light
-    print(f"{json.dumps(locals())}")
+    sys.stdout.buffer.write(_dumps(locals()) + b"\n")
 
 
 def _print(
@@ -129,10 +147,33 @@ async def listen(
 
     last_reading = {}
     stop_event = asyncio.Event()
-    signal(SIGINT, lambda sig, frame: stop_event.set())
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(SIGINT, stop_event.set)
+    except NotImplementedError:
+        # windows event loops have no add_signal_handler.
+        signal(SIGINT, lambda *_: loop.call_soon_threadsafe(stop_event.set))
+
+    pending = 0
+    flush_timer = None
+
+    def flush():
+        nonlocal pending, flush_timer
+        if flush_timer is not None:
+            flush_timer.cancel()
+        sys.stdout.flush()
+        pending = 0
+        flush_timer = None
+
+    # hub and sensors parsed in diff way. pick the parser once per device.
+    parsers = {address: parse_hub if sensor["type"] == "hub" else parse_sensor
+               for address, sensor in sensors.items()}
 
     def callback(device, advertising_data):
-        if device.address not in sensors:
+        nonlocal pending, flush_timer
+        address = device.address
+        parser = parsers.get(address)
+        if parser is None:
             return
         
         m_data = advertising_data.manufacturer_data   
@@ -141,26 +182,25 @@ async def listen(
             stop_event.set()
             return
         
-        data = list(m_data.values())[0]
-        sensor = sensors.get(device.address)
-        
-        # hub and sensors parsed in diff way.
-        light = None
-        if sensor["type"] == "hub":
-            (temp, humidity, light) = parse_hub(data)
-        else:
-            (temp, humidity) = parse_sensor(data)
+        reading = parser(next(iter(m_data.values())))
 
         # if it's a new reading, print it out.
-        last = last_reading.get(device.address, ())
-        if last != (temp, humidity, light) or all_readings:
+        if last_reading.get(address) != reading or all_readings:
             t = int(time()) # utc seconds since epoch.
-            last_reading[device.address] = (temp, humidity, light)
+            last_reading[address] = reading
+            sensor = sensors[address]
             _print(t, output, sensor['location'], sensor['id'], \
-                    advertising_data.rssi, temp, humidity, light)    
+                    advertising_data.rssi, *reading)    
+
+            pending += 1
+            if pending >= FLUSH_EVERY:
+                flush()
+            elif flush_timer is None:
+                flush_timer = loop.call_later(FLUSH_SECS, flush)
 
     async with BleakScanner(callback) as scanner:
         await stop_event.wait()
+    flush()
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@
 // - Table sorted by Device ID
 // - Indoor humidity <30% or >60% highlighted with RED background
 // Build: gcc -O2 -Wall -Wextra -o console_simple_ncurses console_simple_ncurses.c -lncursesw -ljansson -lpthread -lm
-// Run:   SB_STALE_SECS=900 python -u switchbot.py -a -o json | ./console_simple_ncurses
+// Run:   SB_STALE_SECS=900 python switchbot.py -a -o json | ./console_simple_ncurses
 
 #ifndef _XOPEN_SOURCE
 #define _XOPEN_SOURCE 600